@@ -0,0 +1,78 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Circuit breaker states
+CLOSED = "CLOSED"
+OPEN = "OPEN"
+HALF_OPEN = "HALF_OPEN"
+
+class CircuitBreaker:
+    """
+    Per-host circuit breaker. A host trips OPEN after `failure_threshold`
+    consecutive failures and is short-circuited until `cooldown` seconds have
+    passed, after which a single probe is let through (HALF_OPEN).
+    """
+
+    def __init__(self, failure_threshold=5, cooldown=30):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _get_host_state(self, host):
+        return self._hosts.setdefault(host, {"state": CLOSED, "fail_count": 0, "opened_at": 0.0})
+
+    def get_state(self, host):
+        """Return the current state for a host."""
+        with self._lock:
+            return self._hosts.get(host, {}).get("state", CLOSED)
+
+    def is_open(self, host):
+        """Return True if calls to the host should be short-circuited."""
+        with self._lock:
+            host_state = self._hosts.get(host)
+            if host_state is None or host_state["state"] == CLOSED:
+                return False
+            if host_state["state"] == OPEN and time.monotonic() - host_state["opened_at"] >= self.cooldown:
+                # Cooldown elapsed, let exactly one probe through
+                host_state["state"] = HALF_OPEN
+                return False
+            return True
+
+    def record_success(self, host):
+        """Close the breaker for a host after a successful call."""
+        with self._lock:
+            self._hosts.pop(host, None)
+
+    def record_failure(self, host):
+        """Count a failed call, tripping the breaker once the threshold is reached."""
+        with self._lock:
+            host_state = self._get_host_state(host)
+            host_state["fail_count"] += 1
+            if host_state["state"] == HALF_OPEN or host_state["fail_count"] >= self.failure_threshold:
+                if host_state["state"] != OPEN:
+                    logger.warning("Circuit breaker opened for host %s", host)
+                host_state["state"] = OPEN
+                host_state["opened_at"] = time.monotonic()
+
+class Bulkhead:
+    """
+    Per-host concurrency cap. Each host gets its own bounded semaphore so at
+    most `max_concurrent` requests are in flight against it at once.
+    """
+
+    def __init__(self, max_concurrent=8):
+        self.max_concurrent = max_concurrent
+        self._semaphores = {}
+        self._lock = threading.Lock()
+
+    def limit(self, host):
+        """Return the semaphore guarding a host, for use as a context manager."""
+        with self._lock:
+            semaphore = self._semaphores.get(host)
+            if semaphore is None:
+                semaphore = self._semaphores[host] = threading.BoundedSemaphore(self.max_concurrent)
+            return semaphore
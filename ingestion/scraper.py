@@ -1,61 +1,208 @@
 import requests
-import json
+from requests.adapters import HTTPAdapter
+import urllib3
+from urllib3.util.retry import Retry
+import orjson
 import logging
 import os
-import pandas as pd
+from functools import lru_cache
+from urllib.parse import urlparse
+from reliability import Bulkhead, CircuitBreaker
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
 
-# Load configuration from JSON file
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), "config.json")
+
+@lru_cache(maxsize=1)
+def _load_config_cached(mtime):
+    with open(CONFIG_PATH, 'rb') as f:
+        return orjson.loads(f.read())
+
+# Load configuration from JSON file, re-parsing only when the file's mtime changes
 def load_config():
-    config_path = os.path.join(os.path.dirname(__file__), "config.json")
-    with open(config_path, 'r') as f:
-        return json.load(f)
+    return _load_config_cached(os.path.getmtime(CONFIG_PATH))
 
 CONFIG = load_config()
 API_SOURCES = CONFIG["API_SOURCES"]
 RETRY_COUNT = CONFIG["RETRY_COUNT"]
 TIMEOUT = CONFIG["TIMEOUT"]
+CONNECT_TIMEOUT = CONFIG["CONNECT_TIMEOUT"]
 RAW_DATA_DIR = CONFIG["RAW_DATA_DIR"]
+BACKOFF_BASE = CONFIG["BACKOFF_BASE"]
+BACKOFF_CAP = CONFIG["BACKOFF_CAP"]
+BREAKER_FAILURE_THRESHOLD = CONFIG["BREAKER_FAILURE_THRESHOLD"]
+BREAKER_COOLDOWN = CONFIG["BREAKER_COOLDOWN"]
+MAX_CONCURRENCY_PER_HOST = CONFIG["MAX_CONCURRENCY_PER_HOST"]
+
+# Raw file and cache-metadata paths are fixed per source, so build them once
+_OUTPUT_PATHS = {key: os.path.join(RAW_DATA_DIR, f"{key}.{cfg['type']}") for key, cfg in API_SOURCES.items()}
+_META_PATHS = {key: os.path.join(RAW_DATA_DIR, f"{key}.meta.json") for key in API_SOURCES}
+
+# Bytes read per chunk when streaming a download to disk
+DOWNLOAD_CHUNK_SIZE = 1 << 16
+# Raw descriptor flags for downloads (O_BINARY keeps Windows from translating newlines)
+_WRITE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+
+# Only transient failures are worth retrying; other 4xx/5xx responses fail fast
+RETRYABLE_STATUS_CODES = (429, 502, 503, 504)
+
+class CappedRetry(Retry):
+    """Retry policy that never waits longer than BACKOFF_CAP on a Retry-After header."""
+    
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, BACKOFF_CAP)
+
+# Retries (with jittered exponential backoff and Retry-After) run inside the connection pool
+_RETRY = CappedRetry(
+    total=RETRY_COUNT,
+    backoff_factor=BACKOFF_BASE,
+    backoff_max=BACKOFF_CAP,
+    backoff_jitter=BACKOFF_BASE,
+    status_forcelist=RETRYABLE_STATUS_CODES,
+    allowed_methods=frozenset(["GET"]),
+    respect_retry_after_header=True,
+)
+
+# Shared session so keep-alive connections are reused across fetches and warm invocations
+_SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=_RETRY)
+_SESSION.mount("http://", _ADAPTER)
+_SESSION.mount("https://", _ADAPTER)
+
+# Stops paying RETRY_COUNT x TIMEOUT per call once a host is known to be down
+_BREAKER = CircuitBreaker(failure_threshold=BREAKER_FAILURE_THRESHOLD, cooldown=BREAKER_COOLDOWN)
+
+# Caps in-flight requests per host to avoid port exhaustion and 429 storms under concurrency
+_BULKHEAD = Bulkhead(max_concurrent=MAX_CONCURRENCY_PER_HOST)
+
+def close_session():
+    """Close the shared HTTP session and release pooled connections."""
+    _SESSION.close()
+
+def warm_connections(timeout=2):
+    """
+    Open a pooled connection to every configured host with a HEAD request so the
+    TCP/TLS handshake is paid up front. Failures are ignored.
+    """
+    origins = {f"{urlparse(cfg['url']).scheme}://{urlparse(cfg['url']).netloc}/" for cfg in API_SOURCES.values()}
+    for origin in origins:
+        try:
+            # Single attempt on the session's own pool, so retry backoff can't stall init
+            request = requests.Request("HEAD", origin).prepare()
+            pool = _ADAPTER.get_connection_with_tls_context(request, verify=_SESSION.verify)
+            pool.urlopen("HEAD", "/", retries=False, timeout=timeout)
+        except (urllib3.exceptions.HTTPError, requests.exceptions.RequestException) as e:
+            logger.info("Could not pre-connect to %s: %s", origin, e)
+
+@lru_cache(maxsize=None)
+def ensure_dir(path):
+    """Create a directory if it doesn't exist, touching the filesystem only on the first call per path."""
+    os.makedirs(path, exist_ok=True)
+
+def write_all(fd, data):
+    """Write all bytes to a raw file descriptor, looping over short writes."""
+    view = memoryview(data)
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
+
+def load_cache_meta(meta_path):
+    """Load the cached validators (ETag / Last-Modified) for a raw file, if any."""
+    try:
+        with open(meta_path, 'rb') as f:
+            return orjson.loads(f.read())
+    except (OSError, ValueError):
+        return {}
+
+def save_cache_meta(meta_path, response):
+    """Persist the response's cache validators next to the raw file."""
+    meta = {
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified")
+    }
+    if not any(meta.values()):
+        # Drop validators from an older download so they aren't sent for the new content
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        return
+    with open(meta_path, 'wb') as f:
+        f.write(orjson.dumps(meta))
 
 def fetch_data(source_id):
     """
     Fetch data from specified source and save the raw file to raw_data directory.
     """
     if source_id not in API_SOURCES:
-        logging.error(f"Source ID '{source_id}' not found in configuration.")
+        logger.error("Source ID '%s' not found in configuration.", source_id)
         return None
     
     source_config = API_SOURCES[source_id]
     url = source_config["url"]
-    file_type = source_config["type"]
+    host = urlparse(url).netloc
     
-    attempt = 0
-    while attempt < RETRY_COUNT:
-        try:
-            logging.info(f"Fetching data from {url}")
-            response = requests.get(url, timeout=TIMEOUT)
-            response.raise_for_status() 
-            
-            # Create raw_data directory if it doesn't exist
-            os.makedirs(RAW_DATA_DIR, exist_ok=True)
-            
-            # Generate a filename based on source ID and file type
-            file_path = os.path.join(RAW_DATA_DIR, f"{source_id}.{file_type}")
-            
-            # Save the raw response content
-            with open(file_path, 'wb') as f:
-                f.write(response.content)
+    if _BREAKER.is_open(host):
+        logger.error("Circuit breaker open for host %s. Skipping fetch of %s", host, url)
+        return None
+    
+    file_path = _OUTPUT_PATHS[source_id]
+    meta_path = _META_PATHS[source_id]
+    
+    # Send a conditional request when we already hold a copy of the file
+    headers = {}
+    if os.path.exists(file_path):
+        meta = load_cache_meta(meta_path)
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+    
+    # Stays False until the call succeeds, so an unexpected exception still counts as a failure
+    host_healthy = False
+    try:
+        logger.info("Fetching data from %s", url)
+        with _BULKHEAD.limit(host), _SESSION.get(url, timeout=(CONNECT_TIMEOUT, TIMEOUT), stream=True, headers=headers) as response:
+            response.raise_for_status()
             
-            logging.info(f"Successfully saved raw data to {file_path}")
-            return file_path
+            if response.status_code == 304:
+                logger.info("Cache hit, raw data unchanged: %s", file_path)
+                host_healthy = True
+                return file_path
             
-        except requests.exceptions.RequestException as e:
-            attempt += 1
-            logging.error(f"Request failed (attempt {attempt}/{RETRY_COUNT}): {e}")
+            # Create raw_data directory on the first write rather than at import
+            ensure_dir(os.path.dirname(file_path))
             
-            if attempt < RETRY_COUNT:
-                logging.info(f"Retrying in a moment...")
-            else:
-                logging.error("Max retries reached. Failed to fetch data.")
-                return None
\ No newline at end of file
+            # Stream the body to a temporary file so memory stays flat and readers never see a partial file
+            tmp_path = f"{file_path}.part"
+            # Chunks go straight to the descriptor, skipping the BufferedWriter copy
+            fd = os.open(tmp_path, _WRITE_FLAGS, 0o644)
+            try:
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    write_all(fd, chunk)
+            finally:
+                os.close(fd)
+            os.replace(tmp_path, file_path)
+            save_cache_meta(meta_path, response)
+        host_healthy = True
+    except requests.exceptions.RequestException as e:
+        logger.error("Failed to fetch data from %s: %s", url, e)
+        # Client errors mean the host is reachable, so only count server/network failures
+        error_response = getattr(e, "response", None)
+        host_healthy = error_response is not None and error_response.status_code < 500
+        return None
+    finally:
+        # Every exit settles the breaker, so a half-open probe can never leave it stuck
+        if host_healthy:
+            _BREAKER.record_success(host)
+        else:
+            _BREAKER.record_failure(host)
+    
+    logger.info("Successfully saved raw data to %s", file_path)
+    return file_path
+
+# On Lambda, pay the handshakes during the init phase rather than in the billed handler
+if os.environ.get("AWS_LAMBDA_FUNCTION_NAME"):
+    warm_connections()
@@ -1,39 +1,70 @@
 import unittest
 import os
 import sys
-import json
-import shutil
-from unittest.mock import patch, MagicMock
+import orjson
+import tempfile
+from unittest.mock import patch
 import requests
 
 # Add the parent directory to sys.path to import from ingestion
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import scraper
 from scraper import fetch_data, load_config
+from reliability import Bulkhead, CircuitBreaker, CLOSED, OPEN, HALF_OPEN
 import src.main as ingestion_main
 
+class FakeResponse:
+    """Lightweight stand-in for a streamed response returned by the shared session"""
+    
+    def __init__(self, content, status_code=200, headers=None):
+        self.content = content
+        self.status_code = status_code
+        self.headers = headers or {}
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        return False
+    
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} Error", response=self)
+    
+    def iter_content(self, chunk_size=1):
+        return iter([self.content])
+
 class TestIngestion(unittest.TestCase):
     
+    @classmethod
+    def setUpClass(cls):
+        """Load the configuration once for the whole class"""
+        cls.config = load_config()
+    
     def setUp(self):
-        """Set up test environment before each test"""
-        self.config = load_config()
-        self.test_data_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "raw_data")
-        os.makedirs(self.test_data_dir, exist_ok=True)
-        
-    def tearDown(self):
-        """Clean up after each test"""
-        # Remove any test files created during tests
-        for file in os.listdir(self.test_data_dir):
-            file_path = os.path.join(self.test_data_dir, file)
-            if file != ".gitkeep" and os.path.isfile(file_path):
-                os.remove(file_path)
-    
-    @patch('requests.get')
+        """Give each test its own raw data directory and circuit breaker"""
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.test_data_dir = temp_dir.name
+        
+        # Point the scraper's raw file and metadata paths into the temporary directory
+        output_paths = {key: os.path.join(self.test_data_dir, os.path.basename(path))
+                        for key, path in scraper._OUTPUT_PATHS.items()}
+        meta_paths = {key: os.path.join(self.test_data_dir, os.path.basename(path))
+                      for key, path in scraper._META_PATHS.items()}
+        for patcher in (patch.dict(scraper._OUTPUT_PATHS, output_paths),
+                        patch.dict(scraper._META_PATHS, meta_paths),
+                        patch('scraper.RAW_DATA_DIR', self.test_data_dir),
+                        # Fresh circuit breaker so failures don't leak between tests
+                        patch('scraper._BREAKER', CircuitBreaker())):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+    
+    @patch('scraper._SESSION.get')
     def test_json_download(self, mock_get):
         """Test Case 1: Verify JSON file download"""
         # Setup mock response
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.content = b'{"employees": [{"id": 1, "name": "John Doe", "email": "john@example.com"}]}'
+        mock_response = FakeResponse(b'{"employees": [{"id": 1, "name": "John Doe", "email": "john@example.com"}]}')
         mock_get.return_value = mock_response
         
         # Test function
@@ -49,13 +80,11 @@ class TestIngestion(unittest.TestCase):
             data = f.read()
             self.assertEqual(data, mock_response.content)
     
-    @patch('requests.get')
+    @patch('scraper._SESSION.get')
     def test_csv_download(self, mock_get):
         """Test Case 1: Verify CSV file download"""
         # Setup mock response
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.content = b'id,name,email\n1,John Doe,john@example.com'
+        mock_response = FakeResponse(b'id,name,email\n1,John Doe,john@example.com')
         mock_get.return_value = mock_response
         
         # Test function
@@ -71,42 +100,166 @@ class TestIngestion(unittest.TestCase):
             data = f.read()
             self.assertEqual(data, mock_response.content)
     
-    @patch('requests.get')
-    def test_download_retry_mechanism(self, mock_get):
-        """Test Case 1: Verify retry mechanism works"""
-        # Create mock responses - first two fail, third succeeds
-        mock_fail1 = MagicMock()
-        mock_fail1.raise_for_status.side_effect = requests.exceptions.ConnectionError("Connection error")
+    @patch('scraper._SESSION.get')
+    def test_download_creates_raw_data_dir(self, mock_get):
+        """Test that the raw data directory is created on the first write"""
+        mock_get.return_value = FakeResponse(b'{"employees": []}')
+        file_path = os.path.join(self.test_data_dir, "new_dir", "employees_json.json")
         
-        mock_fail2 = MagicMock()
-        mock_fail2.raise_for_status.side_effect = requests.exceptions.Timeout("Timeout error")
+        with patch.dict(scraper._OUTPUT_PATHS, employees_json=file_path):
+            self.assertEqual(fetch_data("employees_json"), file_path)
         
-        mock_success = MagicMock()
-        mock_success.status_code = 200
-        mock_success.content = b'{"employees": [{"id": 1}]}'
+        # Assert the missing directory was created and the file written into it
+        self.assertTrue(os.path.isfile(file_path))
+    
+    @patch('scraper._SESSION.get')
+    def test_conditional_download_cache_hit(self, mock_get):
+        """Test that an unchanged upstream file (304) reuses the raw file on disk"""
+        # First download stores the file and its ETag
+        mock_get.return_value = FakeResponse(b'{"employees": [{"id": 1}]}', headers={"ETag": '"v1"'})
+        file_path = fetch_data("employees_json")
         
-        # Set the side effect sequence
-        mock_get.side_effect = [mock_fail1, mock_fail2, mock_success]
+        # Second download is conditional and answered with 304 Not Modified
+        mock_get.return_value = FakeResponse(b'', status_code=304)
+        self.assertEqual(fetch_data("employees_json"), file_path)
         
-        # Test function
-        source_id = "employees_json"
-        file_path = fetch_data(source_id)
+        # Assert the ETag was sent and the cached content kept
+        self.assertEqual(mock_get.call_args.kwargs["headers"], {"If-None-Match": '"v1"'})
+        self.assertEqual(mock_get.call_args.kwargs["timeout"],
+                         (self.config["CONNECT_TIMEOUT"], self.config["TIMEOUT"]))
+        with open(file_path, 'rb') as f:
+            self.assertEqual(f.read(), b'{"employees": [{"id": 1}]}')
+    
+    def test_download_retry_mechanism(self):
+        """Test Case 1: Verify retry mechanism is configured on the session"""
+        url = self.config["API_SOURCES"]["employees_json"]["url"]
+        retry = scraper._SESSION.get_adapter(url).max_retries
         
-        # Assert file was created after retries
-        self.assertIsNotNone(file_path)
-        self.assertTrue(os.path.exists(file_path))
+        # Assert transient failures are retried with backoff
+        self.assertEqual(retry.total, self.config["RETRY_COUNT"])
+        self.assertGreater(retry.backoff_factor, 0)
+        self.assertTrue(retry.respect_retry_after_header)
+        for status in (429, 502, 503, 504):
+            self.assertTrue(retry.is_retry("GET", status))
+        
+        # Assert client errors are never retried
+        self.assertFalse(retry.is_retry("GET", 404))
+    
+    def test_retry_after_is_capped(self):
+        """Test that a long Retry-After header is clamped to BACKOFF_CAP"""
+        response = FakeResponse(b'', status_code=503, headers={"Retry-After": "3600"})
+        
+        # Assert the cap survives the copies urllib3 makes on every retry
+        retry = scraper._RETRY.new(total=scraper._RETRY.total - 1)
+        self.assertIsInstance(retry, scraper.CappedRetry)
+        self.assertEqual(retry.get_retry_after(response), scraper.BACKOFF_CAP)
+    
+    @patch('scraper._SESSION.get')
+    def test_fetch_failure(self, mock_get):
+        """Test that fetch_data returns None once retries are exhausted"""
+        mock_get.side_effect = requests.exceptions.RetryError("Max retries exceeded")
+        
+        file_path = fetch_data("employees_json")
         
-        # Verify mock was called 3 times (original + 2 retries)
-        self.assertEqual(mock_get.call_count, 3)
+        # Assert no file path is returned after a terminal failure
+        self.assertIsNone(file_path)
+        self.assertEqual(mock_get.call_count, 1)
+    
+    def test_circuit_breaker_states(self):
+        """Test the circuit breaker opens, probes and closes again"""
+        breaker = CircuitBreaker(failure_threshold=2, cooldown=0)
+        host = "api.example.com"
+        
+        breaker.record_failure(host)
+        self.assertEqual(breaker.get_state(host), CLOSED)
+        self.assertFalse(breaker.is_open(host))
+        
+        # Threshold reached: breaker trips
+        breaker.record_failure(host)
+        self.assertEqual(breaker.get_state(host), OPEN)
+        
+        # Cooldown elapsed: a single probe is allowed through
+        self.assertFalse(breaker.is_open(host))
+        self.assertEqual(breaker.get_state(host), HALF_OPEN)
+        self.assertTrue(breaker.is_open(host))
+        
+        # Successful probe closes the breaker
+        breaker.record_success(host)
+        self.assertEqual(breaker.get_state(host), CLOSED)
+    
+    @patch('scraper._SESSION.get')
+    def test_circuit_breaker_short_circuits_fetch(self, mock_get):
+        """Test that fetch_data skips the request while the breaker is open"""
+        url = self.config["API_SOURCES"]["employees_json"]["url"]
+        host = scraper.urlparse(url).netloc
+        for _ in range(scraper.BREAKER_FAILURE_THRESHOLD):
+            scraper._BREAKER.record_failure(host)
+        
+        file_path = fetch_data("employees_json")
+        
+        # Assert no request was made for the tripped host
+        self.assertIsNone(file_path)
+        mock_get.assert_not_called()
+    
+    def trip_breaker(self, source_id):
+        """Swap in a breaker that is open for the source's host with no cooldown"""
+        host = scraper.urlparse(self.config["API_SOURCES"][source_id]["url"]).netloc
+        breaker = CircuitBreaker(failure_threshold=1, cooldown=0)
+        breaker.record_failure(host)
+        patcher = patch('scraper._BREAKER', breaker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return breaker, host
     
-    @patch('ingestion.scraper.fetch_data')
+    @patch('scraper._SESSION.get')
+    def test_half_open_probe_client_error_closes_breaker(self, mock_get):
+        """Test that a 4xx answer to the half-open probe closes the breaker"""
+        breaker, host = self.trip_breaker("employees_json")
+        mock_get.return_value = FakeResponse(b'', status_code=404)
+        
+        self.assertIsNone(fetch_data("employees_json"))
+        
+        # Assert the host answered, so later fetches go through again
+        self.assertEqual(breaker.get_state(host), CLOSED)
+        self.assertFalse(breaker.is_open(host))
+    
+    @patch('scraper._SESSION.get')
+    def test_half_open_probe_unexpected_error_reopens_breaker(self, mock_get):
+        """Test that an exception outside requests during the probe reopens the breaker"""
+        breaker, host = self.trip_breaker("employees_json")
+        mock_get.return_value = FakeResponse(b'{"employees": []}')
+        
+        with patch('scraper.os.replace', side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                fetch_data("employees_json")
+        
+        # Assert the breaker is not left half-open
+        self.assertEqual(breaker.get_state(host), OPEN)
+    
+    def test_bulkhead_limits_per_host(self):
+        """Test the bulkhead caps concurrent calls for each host independently"""
+        bulkhead = Bulkhead(max_concurrent=2)
+        semaphore = bulkhead.limit("api.example.com")
+        
+        # Assert the same host shares one semaphore, other hosts get their own
+        self.assertIs(bulkhead.limit("api.example.com"), semaphore)
+        self.assertIsNot(bulkhead.limit("other.example.com"), semaphore)
+        
+        # Assert a third concurrent call to the same host would block
+        self.assertTrue(semaphore.acquire(blocking=False))
+        self.assertTrue(semaphore.acquire(blocking=False))
+        self.assertFalse(semaphore.acquire(blocking=False))
+        semaphore.release()
+        semaphore.release()
+    
+    @patch.object(ingestion_main, 'fetch_data')
     def test_json_extraction(self, mock_fetch):
         """Test Case 2: Verify JSON file extraction"""
         # Create a test JSON file
         test_file = os.path.join(self.test_data_dir, "employees_json.json")
         test_data = {"employees": [{"id": 1, "name": "John Doe", "email": "john@example.com"}]}
-        with open(test_file, 'w') as f:
-            json.dump(test_data, f)
+        with open(test_file, 'wb') as f:
+            f.write(orjson.dumps(test_data))
         
         # Mock the fetch_data function to return our test file
         mock_fetch.return_value = test_file
@@ -124,8 +277,9 @@ class TestIngestion(unittest.TestCase):
         # Assert the processing was successful
         self.assertEqual(result["statusCode"], 200)
         self.assertIn("successfully", result["body"])
+        mock_fetch.assert_called_once_with("employees_json")
     
-    @patch('ingestion.scraper.fetch_data')
+    @patch.object(ingestion_main, 'fetch_data')
     def test_csv_extraction(self, mock_fetch):
         """Test Case 2: Verify CSV file extraction"""
         # Create a test CSV file
@@ -149,6 +303,7 @@ class TestIngestion(unittest.TestCase):
         # Assert the processing was successful
         self.assertEqual(result["statusCode"], 200)
         self.assertIn("successfully", result["body"])
+        mock_fetch.assert_called_once_with("employees_csv")
     
     def test_invalid_source_id(self):
         """Test handling of invalid source ID"""
@@ -167,14 +322,14 @@ class TestIngestion(unittest.TestCase):
             test_file = os.path.join(self.test_data_dir, f"{source_key}.{file_type}")
             
             if file_type == "json":
-                with open(test_file, 'w') as f:
-                    json.dump({"employees": [{"id": 1, "name": "Test User"}]}, f)
+                with open(test_file, 'wb') as f:
+                    f.write(orjson.dumps({"employees": [{"id": 1, "name": "Test User"}]}))
             elif file_type == "csv":
                 with open(test_file, 'w') as f:
                     f.write("id,name,email\n1,Test User,test@example.com")
         
         # Test the process_all_sources function
-        with patch('ingestion.scraper.fetch_data', return_value=True):
+        with patch.object(ingestion_main, 'fetch_data', return_value=True):
             result = ingestion_main.process_all_sources()
             
             # Assert all sources were processed successfully
@@ -1,46 +1,157 @@
 import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
 import logging
 import os
-import json
-from bs4 import BeautifulSoup
-import pyarrow
+import html
+import re
+import orjson
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+
+# Copy-on-write lets normalize_data work on the caller's frame without a defensive copy;
+# it is always on from pandas 3, where the option is deprecated
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), "config.json")
 
-# Load configuration from JSON file
+@lru_cache(maxsize=1)
+def _load_config_cached(mtime):
+    with open(CONFIG_PATH, 'rb') as f:
+        return orjson.loads(f.read())
+
+# Load configuration from JSON file, re-parsing only when the file's mtime changes
 def load_config():
-    config_path = os.path.join(os.path.dirname(__file__), "config.json")
-    with open(config_path, 'r') as f:
-        return json.load(f)
+    return _load_config_cached(os.path.getmtime(CONFIG_PATH))
 
 CONFIG = load_config()
 PROCESSED_DATA_DIR = CONFIG["PROCESSED_DATA_DIR"]
+# Parquet is always written; the CSV copy is opt-in
+EMIT_CSV = CONFIG.get("EMIT_CSV", False)
+# Rows per Parquet row group; bounds writer memory and lets readers skip groups
+PARQUET_ROW_GROUP_SIZE = 64_000
+
+# Whole-year experience buckets (right-inclusive) and the designation for each
+DESIGNATION_BINS = [-np.inf, 2, 5, 10, np.inf]
+DESIGNATION_LABELS = ["System Engineer", "Data Engineer", "Senior Data Engineer", "Lead"]
+
+# Source name columns dropped once Full Name has been built from them
+NAME_PART_COLUMNS = ['first_name', 'last_name', 'first name', 'last name', 'name',
+                     'employee_first_name', 'employee_last_name', 'first', 'last']
+
+# Output columns, in the order they are written
+FINAL_COLUMNS = ["id", "Full Name", "email", "phone", "gender", "age",
+                 "job_title", "years_of_experience", "salary", "department", "designation"]
+
+# Output columns coerced to integers and to strings
+INT_COLUMNS = ["age", "years_of_experience", "salary"]
+STRING_COLUMNS = ["full name", "email", "gender", "job_title", "department", "designation"]
+
+# Low-cardinality output columns stored as pandas categoricals
+CATEGORICAL_COLUMNS = ["gender", "designation", "department", "job_title"]
+
+# Matches HTML tags, comments and doctypes, but not a bare "<" used as text
+_TAG_RE = re.compile(r"<[A-Za-z/!?][^>]*>")
+# Runs of non-digit characters stripped from phone numbers
+_NON_DIGIT_RE = re.compile(r"\D+")
+
+# Known column-name variations for each standardized column, in order of preference
+COLUMN_ALIASES = {
+    "phone": ['phone', 'phone_number', 'phonenumber', 'contact', 'telephone',
+              'employee_phone', 'employee_contact'],
+    "years_of_experience": ['years_of_experience', 'years of experience', 'experience', 'experience_years',
+                            'years_experience', 'yoe', 'years', 'employee_experience', 'experience_yrs'],
+    "salary": ['salary', 'annual_salary', 'pay', 'compensation', 'employee_salary'],
+    "email": ['email', 'email_address', 'emailaddress', 'mail', 'employee_email'],
+    "gender": ['gender', 'sex', 'employee_gender'],
+    "job_title": ['job_title', 'jobtitle', 'job title', 'position', 'role', 'employee_jobtitle',
+                  'employee_title', 'employee_position', 'job'],
+    "department": ['department', 'dept', 'team', 'employee_department', 'employee_dept'],
+    "age": ['age', 'years_old', 'employee_age'],
+}
+
+# Defaults for standardized columns missing from the source
+COLUMN_DEFAULTS = {
+    "full name": "", "email": "", "gender": "", "age": 0,
+    "job_title": "", "salary": 0, "department": "",
+}
+
+@lru_cache(maxsize=64)
+def _column_renames(columns):
+    """
+    Return the rename map taking the first matching variation of each column to its standardized name.
+    Keyed on the frozenset of column names, so repeated schemas skip the alias scan.
+    """
+    renames = {}
+    for canonical, aliases in COLUMN_ALIASES.items():
+        found = next((col for col in aliases if col in columns), None)
+        if found and found != canonical:
+            renames[found] = canonical
+    return renames
 
 def clean_html(text):
     """Remove HTML tags and return plain text."""
-    return BeautifulSoup(text, "lxml").text.strip() if pd.notna(text) and "<" in str(text) and ">" in str(text) else text
+    if not isinstance(text, str) or "<" not in text or ">" not in text:
+        return text
+    return html.unescape(_TAG_RE.sub("", text)).strip()
+
+def dedup_columns(columns):
+    """
+    Make repeated column names unique the way pandas' default CSV parser does: repeats become
+    name.1, name.2, ..., skipping any suffixed name already present in the header.
+    """
+    columns = list(columns)
+    taken = set(columns)
+    counts = {}
+    deduped = []
+    for col in columns:
+        if col not in counts:
+            counts[col] = 1
+            deduped.append(col)
+            continue
+        suffix = counts[col]
+        while f"{col}.{suffix}" in taken:
+            suffix += 1
+        counts[col] = suffix + 1
+        taken.add(f"{col}.{suffix}")
+        deduped.append(f"{col}.{suffix}")
+    return deduped
 
 def read_raw_data(source_id):
     """
     Read the raw data file based on its type and return the data.
     """
     if source_id not in CONFIG["RAW_DATA_SOURCES"]:
-        logging.error(f"Source ID '{source_id}' not found in configuration.")
+        logger.error("Source ID '%s' not found in configuration.", source_id)
         return None
     
     source_config = CONFIG["RAW_DATA_SOURCES"][source_id]
     file_path = source_config["path"]
     file_type = source_config["type"]
     
-    if not os.path.exists(file_path):
-        logging.error(f"File does not exist: {file_path}")
-        logging.info(f"Current working directory: {os.getcwd()}")
+    # A single stat both checks the file exists and that it has content
+    try:
+        file_size = os.stat(file_path).st_size
+    except FileNotFoundError:
+        logger.error("File does not exist: %s", file_path)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Current working directory: %s", os.getcwd())
+        return None
+    
+    if file_size == 0:
+        logger.error("File is empty: %s", file_path)
         return None
     
     try:
         if file_type == 'json':
-            with open(file_path, 'r') as f:
-                data = json.load(f)
+            with open(file_path, 'rb') as f:
+                data = orjson.loads(f.read())
                 
                 # If it's a list, wrap it in a dict with 'employees' key
                 if isinstance(data, list):
@@ -49,40 +160,36 @@ def read_raw_data(source_id):
                 
         elif file_type == "csv":
             try:
-                # Open the file manually to check the first few lines before passing it to Pandas
-                with open(file_path, "r", encoding="utf-8") as f:
-                    lines = [line.strip() for line in f.readlines()]
-
-                # If the file is empty or has only a single row (header with no data), return None
-                if not lines or len(lines) < 2:
-                    logging.error(f"CSV file {file_path} is empty or contains only a header.")
-                    return None
-
-                # Load CSV into a DataFrame
+                # Load CSV into a DataFrame in a single pass; an empty file raises EmptyDataError.
+                # The default engine pads short rows with NaN, where the pyarrow engine would skip them
                 df = pd.read_csv(file_path, dtype=str, on_bad_lines="skip")
 
                 # Ensure valid CSV: must have at least 2 columns and 2 rows (header + 1 row of data)
                 if df.empty or df.shape[1] < 2 or len(df) < 2:
-                    logging.error(f"CSV file {file_path} is invalid or contains only one row of data.")
+                    logger.error("CSV file %s is invalid or contains only one row of data.", file_path)
                     return None
 
                 return df
 
             except (pd.errors.ParserError, UnicodeDecodeError, pd.errors.EmptyDataError, OSError) as e:
-                logging.error(f"Failed to read CSV file {file_path}: {str(e)}")
+                logger.error("Failed to read CSV file %s: %s", file_path, e)
                 return None
 
         elif file_type in ['xlsx', 'xls']:
             return pd.read_excel(file_path)
             
         else:
-            logging.error(f"Unsupported file format: {file_type}")
+            logger.error("Unsupported file format: %s", file_type)
             return None
             
     except Exception as e:
-        logging.error(f"Error reading file {file_path}: {e}")
+        logger.error("Error reading file %s: %s", file_path, e)
         return None
 
+def join_names(first, last):
+    """Join first and last name columns with a space, treating missing parts as empty strings."""
+    return first.astype("string").str.cat(last.astype("string"), sep=" ", na_rep="")
+
 def normalize_data(data, source_type='json'):
     """
     Normalize and clean data from different source types.
@@ -90,243 +197,174 @@ def normalize_data(data, source_type='json'):
     # Convert data to DataFrame based on source type
     if source_type == 'json':
         if not data or "employees" not in data:
-            logging.error("Invalid data format received for JSON.")
+            logger.error("Invalid data format received for JSON.")
             return None
         df = pd.DataFrame(data["employees"])
     elif source_type in ['csv', 'xlsx']:
         # For CSV and Excel, data should already be a DataFrame
         if not isinstance(data, pd.DataFrame):
-            logging.error(f"Expected DataFrame for {source_type} but got {type(data)}")
+            logger.error("Expected DataFrame for %s but got %s", source_type, type(data))
             return None
-        df = data.copy()
+        df = data
         
         # Log the original columns to understand what we're working with
-        logging.info(f"Original columns in {source_type} dataframe: {df.columns.tolist()}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Original columns in %s dataframe: %s", source_type, df.columns.tolist())
     else:
         # For any other type, try to use the data if it's already a DataFrame
         if isinstance(data, pd.DataFrame):
-            df = data.copy()
+            df = data
         else:
-            logging.error(f"Unsupported data type for normalization: {type(data)}")
+            logger.error("Unsupported data type for normalization: %s", type(data))
             return None
     
     # Standardize column names (convert to lowercase for case-insensitive matching)
-    df.columns = [col.lower() for col in df.columns]
+    columns = df.columns.map(str.lower)
+    # Names differing only in case (or repeated in the source) collide once lowercased
+    if columns.has_duplicates:
+        columns = dedup_columns(columns)
+    # set_axis returns a new frame, so the caller's DataFrame keeps its original columns
+    df = df.set_axis(columns, axis=1)
     
     # Handle name variations
     # Check if we have first_name and last_name columns for creating Full Name
     if 'first_name' in df.columns and 'last_name' in df.columns:
-        # Fix: Fill NaN/None values with empty string before concatenation
-        df["full name"] = df["first_name"].fillna("") + " " + df["last_name"].fillna("")
+        df["full name"] = join_names(df["first_name"], df["last_name"])
     elif 'firstname' in df.columns and 'lastname' in df.columns:
-        df["full name"] = df["firstname"].fillna("") + " " + df["lastname"].fillna("")
+        df["full name"] = join_names(df["firstname"], df["lastname"])
     elif 'name' in df.columns:
         # If there's just a name column, use that as Full Name
         df["full name"] = df["name"]
     # For CSV/Excel specific patterns - look for column patterns
     elif 'employee_first_name' in df.columns and 'employee_last_name' in df.columns:
-        df["full name"] = df["employee_first_name"].fillna("") + " " + df["employee_last_name"].fillna("")
+        df["full name"] = join_names(df["employee_first_name"], df["employee_last_name"])
     elif 'first name' in df.columns and 'last name' in df.columns:
-        df["full name"] = df["first name"].fillna("") + " " + df["last name"].fillna("")
+        df["full name"] = join_names(df["first name"], df["last name"])
     elif 'full name' not in df.columns:
         # If neither pattern exists, create an empty Full Name column
         df["full name"] = ""
 
     # Clean up original name columns after creating Full Name if we combined them
     if 'full name' in df.columns and not df.empty and df['full name'].iloc[0] != "":
-        for col in ['first_name', 'last_name', 'first name', 'last name', 'name', 
-                   'employee_first_name', 'employee_last_name', 'first', 'last']:
-            if col in df.columns:
-                df = df.drop(columns=[col], errors="ignore")
+        df = df.drop(columns=NAME_PART_COLUMNS, errors="ignore")
     
-    # Process phone numbers (if column exists) with multiple possible column names
-    phone_cols = ['phone', 'phone_number', 'phonenumber', 'contact', 'telephone', 
-                  'employee_phone', 'employee_contact']
-    found_phone_col = next((col for col in phone_cols if col in df.columns), None)
+    # Map every known column variation onto its standardized name in a single rename
+    df = df.rename(columns=_column_renames(frozenset(df.columns)))
     
-    if found_phone_col:
-        def process_phone(phone):
-            if pd.notna(phone):
-                if "x" in str(phone):
-                    return "Invalid Number"
-                digits = ''.join(filter(str.isdigit, str(phone)))
-                return int(digits) if digits else "Invalid Number"
-            return "Invalid Number"
-        
-        df["phone"] = df[found_phone_col].apply(process_phone)
-        # Drop the original phone column if it's not already named 'phone'
-        if found_phone_col != 'phone':
-            df = df.drop(columns=[found_phone_col], errors="ignore")
-    else:
-        df["phone"] = "Not Available"
+    # Derived columns are collected here and added to the frame in a single assign
+    derived = {}
     
-    # Assign designation based on experience (with multiple possible column names)
-    exp_cols = ['years_of_experience','years of experience', 'experience', 'experience_years', 'years_experience', 'yoe',
-               'years', 'employee_experience', 'experience_yrs']
-    found_exp_col = next((col for col in exp_cols if col in df.columns), None)
-    
-    if found_exp_col:
-        def assign_designation(exp):
-            try:
-                exp = float(exp)
-                if pd.isna(exp) or exp == 0:
-                    return "Unknown"
-                if exp < 3:
-                    return "System Engineer"
-                elif 3 <= exp <= 5:
-                    return "Data Engineer"
-                elif 5 < exp <= 10:
-                    return "Senior Data Engineer"
-                else:
-                    return "Lead"
-            except (ValueError, TypeError):
-                return "Unknown"
-
-        
-        df[found_exp_col] = pd.to_numeric(df[found_exp_col], errors='coerce').fillna(0).astype(int)
-        df["designation"] = df[found_exp_col].apply(assign_designation)
-
-        # Make sure we keep the experience column with a standardized name
-        if found_exp_col != 'years_of_experience':
-            df["years_of_experience"] = df[found_exp_col]
-            df = df.drop(columns=[found_exp_col], errors="ignore")
+    # Process phone numbers (if column exists)
+    if "phone" in df.columns:
+        phone = df["phone"]
+        phone_text = phone.astype(str)
+        digits = phone_text.str.replace(_NON_DIGIT_RE, "", regex=True)
+        # Numbers with an extension ("x") or without any digits are invalid
+        invalid = phone.isna() | phone_text.str.contains("x", regex=False) | (digits == "")
+        # Drop leading zeros the same way int(digits) would, keeping a lone "0"
+        digits = digits.str.lstrip("0").replace("", "0")
+        derived["phone"] = digits.where(~invalid, "Invalid Number")
     else:
-        df["designation"] = "Unknown"
-        df["years_of_experience"] = 0
+        derived["phone"] = "Not Available"
     
-    # Handle salary column variations
-    salary_cols = ['salary', 'annual_salary', 'pay', 'compensation', 'employee_salary']
-    found_salary_col = next((col for col in salary_cols if col in df.columns), None)
-    if found_salary_col and found_salary_col != 'salary':
-        df["salary"] = df[found_salary_col]
-        df = df.drop(columns=[found_salary_col], errors="ignore")
-    elif 'salary' not in df.columns:
-        df["salary"] = 0
-        
-    # Handle email column variations
-    email_cols = ['email', 'email_address', 'emailaddress', 'mail', 'employee_email']
-    found_email_col = next((col for col in email_cols if col in df.columns), None)
-    if found_email_col and found_email_col != 'email':
-        df["email"] = df[found_email_col]
-        df = df.drop(columns=[found_email_col], errors="ignore")
-    elif 'email' not in df.columns:
-        df["email"] = ""
-        
-    # Handle gender column variations
-    gender_cols = ['gender', 'sex', 'employee_gender']
-    found_gender_col = next((col for col in gender_cols if col in df.columns), None)
-    if found_gender_col and found_gender_col != 'gender':
-        df["gender"] = df[found_gender_col]
-        df = df.drop(columns=[found_gender_col], errors="ignore")
-    elif 'gender' not in df.columns:
-        df["gender"] = ""
-        
-    # Handle job title column variations
-    job_cols = ['job_title', 'jobtitle', 'job title', 'position', 'role', 'employee_jobtitle', 
-               'employee_title', 'employee_position', 'job']
-    found_job_col = next((col for col in job_cols if col in df.columns), None)
-    if found_job_col and found_job_col != 'job_title':
-        df["job_title"] = df[found_job_col]
-        df = df.drop(columns=[found_job_col], errors="ignore")
-    elif 'job_title' not in df.columns:
-        df["job_title"] = ""
-        
-    # Handle department column variations
-    dept_cols = ['department', 'dept', 'team', 'employee_department', 'employee_dept']
-    found_dept_col = next((col for col in dept_cols if col in df.columns), None)
-    if found_dept_col and found_dept_col != 'department':
-        df["department"] = df[found_dept_col]
-        df = df.drop(columns=[found_dept_col], errors="ignore")
-    elif 'department' not in df.columns:
-        df["department"] = ""
-        
-    # Handle age column variations
-    age_cols = ['age', 'years_old', 'employee_age']
-    found_age_col = next((col for col in age_cols if col in df.columns), None)
-    if found_age_col and found_age_col != 'age':
-        df["age"] = df[found_age_col]
-        df = df.drop(columns=[found_age_col], errors="ignore")
-    elif 'age' not in df.columns:
-        df["age"] = 0
+    # Assign designation based on experience
+    if "years_of_experience" in df.columns:
+        experience = pd.to_numeric(df["years_of_experience"], errors='coerce').fillna(0).astype(int)
+        derived["years_of_experience"] = experience
+        # Bucket experience in one pass: <3 System, 3-5 Data, 6-10 Senior, >10 Lead; 0 means unknown
+        designation = pd.cut(experience, bins=DESIGNATION_BINS, labels=DESIGNATION_LABELS).astype(object)
+        derived["designation"] = designation.where(experience != 0, "Unknown")
+    else:
+        derived["designation"] = "Unknown"
+        derived["years_of_experience"] = 0
     
-    # Define expected columns and ensure they exist with standardized names
-    expected_columns = ["id", "full name", "email", "phone", "gender", "age", 
-                        "job_title", "years_of_experience", "salary", "department", "designation"]
-    
-    # Add missing columns with default values
-    for col in expected_columns:
-        if col not in df.columns:
-            if col in ["age", "years_of_experience", "salary"]:
-                df[col] = 0
-            else:
-                df[col] = ""
+    # Add any remaining missing columns with default values
+    derived.update({col: default for col, default in COLUMN_DEFAULTS.items() if col not in df.columns})
+    df = df.assign(**derived)
     
     # Ensure id column exists and is proper
     if "id" not in df.columns:
-        df["id"] = range(1, len(df) + 1)
+        df["id"] = np.arange(1, len(df) + 1)
     else:
         # Make sure id is numeric
         try:
-            df["id"] = pd.to_numeric(df["id"], errors='coerce')
+            if not pd.api.types.is_integer_dtype(df["id"]):
+                df["id"] = pd.to_numeric(df["id"], errors='coerce')
             # Check if all values are NaN or 0
             if df["id"].isna().all() or (df["id"] == 0).all():
                 # Create new IDs
-                df["id"] = range(1, len(df) + 1)
+                df["id"] = np.arange(1, len(df) + 1)
             else:
                 # Fill any NaN values with new sequential IDs starting from max+1
                 max_id = df["id"].max()
                 missing_mask = df["id"].isna()
                 missing_count = missing_mask.sum()
                 if missing_count > 0:
-                    df.loc[missing_mask, "id"] = range(int(max_id)+1, int(max_id)+missing_count+1)
+                    df.loc[missing_mask, "id"] = np.arange(int(max_id)+1, int(max_id)+missing_count+1)
                 df["id"] = df["id"].fillna(0).astype(int)
-        except:
+        except (ValueError, TypeError, OverflowError):
             # If conversion fails, create new IDs
-            df["id"] = range(1, len(df) + 1)
-    
-    # Handle potential NaN values for Integer columns
-    for col in ["age", "years_of_experience", "salary"]:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(int)
+            df["id"] = np.arange(1, len(df) + 1)
     
-    # Convert string columns
-    string_columns = ["full name", "email", "gender", "job_title", "department", "designation"]
-    for col in string_columns:
-        if col in df.columns:
-            df[col] = df[col].fillna("").astype(str)
+    # Coerce the integer columns, then fill and cast every output column in single passes
+    df[INT_COLUMNS] = df[INT_COLUMNS].apply(pd.to_numeric, errors='coerce')
+    df = df.fillna({**dict.fromkeys(INT_COLUMNS, 0), **dict.fromkeys(STRING_COLUMNS, "")})
+    # Strings are stored as contiguous Arrow arrays rather than per-cell Python objects
+    df = df.astype({**dict.fromkeys(INT_COLUMNS, int), **dict.fromkeys(STRING_COLUMNS + ["phone"], "string[pyarrow]")})
     
-    # Convert phone to string
-    if "phone" in df.columns:
-        df["phone"] = df["phone"].astype(str)
+    # Low-cardinality columns become categoricals, written as dictionary-encoded Parquet columns
+    df = df.astype(dict.fromkeys(CATEGORICAL_COLUMNS, "category"))
     
     # Rename 'full name' to 'Full Name' for final output consistency
     df = df.rename(columns={'full name': 'Full Name'})
     
     # Print the final columns for debugging
-    logging.info(f"Final columns in dataframe: {df.columns.tolist()}")
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("Final columns in dataframe: %s", df.columns.tolist())
     
-    # Reorder columns in the exact specified order (keeping any additional columns at the end)
-    final_expected_columns = ["id", "Full Name", "email", "phone", "gender", "age", 
-                         "job_title", "years_of_experience", "salary", "department", "designation"]
-    
-    available_columns = [col for col in final_expected_columns if col in df.columns]
-    other_columns = [col for col in df.columns if col not in final_expected_columns]
-    final_column_order = available_columns + other_columns
-    
-    # Return DataFrame with columns in the specified order
-    return df[final_column_order]
+    # Every output column exists by now, so lay them out in one reindex (keeping any additional columns at the end)
+    extra_columns = df.columns.difference(FINAL_COLUMNS, sort=False).tolist()
+    return df.reindex(columns=FINAL_COLUMNS + extra_columns)
+
+def write_parquet(table, parquet_path):
+    """Write the Arrow table to Parquet, the canonical processed output."""
+    # Write to a temporary file and rename it into place so readers never see a partial file
+    tmp_path = f"{parquet_path}.part"
+    pq.write_table(table, tmp_path, compression="zstd", compression_level=3,
+                    use_dictionary=True, row_group_size=PARQUET_ROW_GROUP_SIZE)
+    os.replace(tmp_path, parquet_path)
 
-def save_data(df, source_id):
+def write_csv(table, csv_path):
+    """Write the Arrow table to CSV with pyarrow's C++ writer."""
+    tmp_path = f"{csv_path}.part"
+    pa_csv.write_csv(table, tmp_path)
+    os.replace(tmp_path, csv_path)
+
+def save_data(df, source_id, save_csv=None):
     """
-    Save data to CSV and Parquet.
+    Save data to Parquet, plus CSV when save_csv is true (defaults to EMIT_CSV).
     """
+    if save_csv is None:
+        save_csv = EMIT_CSV
+
     # Ensure processed data directory exists
     os.makedirs(PROCESSED_DATA_DIR, exist_ok=True)
     
-    csv_path = os.path.join(PROCESSED_DATA_DIR, f"{source_id}_processed.csv")
     parquet_path = os.path.join(PROCESSED_DATA_DIR, f"{source_id}_processed.parquet")
+    # Convert once and feed the same Arrow table to both writers
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    if not save_csv:
+        write_parquet(table, parquet_path)
+        logger.info("Processed data saved: %s", parquet_path)
+        return
+
+    csv_path = os.path.join(PROCESSED_DATA_DIR, f"{source_id}_processed.csv")
 
-    df.to_csv(csv_path, index=False)
-    df.to_parquet(parquet_path, engine="pyarrow", index=False)
+    # Both writers release the GIL, so overlap the CSV write with Parquet encoding
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        csv_future = executor.submit(write_csv, table, csv_path)
+        write_parquet(table, parquet_path)
+        csv_future.result()
 
-    logging.info(f"Processed data saved: {csv_path}, {parquet_path}")
\ No newline at end of file
+    logger.info("Processed data saved: %s, %s", csv_path, parquet_path)
@@ -1,33 +1,32 @@
 import os
 import logging
-import json
+import orjson
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
 # Add the parent directory to sys.path to import from processing
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from processor import read_raw_data, normalize_data, save_data
+from processor import read_raw_data, normalize_data, save_data, load_config
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
-
-def load_config():
-    config_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "config.json")
-    with open(config_path, 'r') as f:
-        return json.load(f)
+logger = logging.getLogger(__name__)
 
 CONFIG = load_config()
 RAW_DATA_SOURCES = CONFIG["RAW_DATA_SOURCES"]
+# Built once at import so lookups on warm invocations are O(1)
+_ID_TO_KEY = {source_data["id"]: source_key for source_key, source_data in RAW_DATA_SOURCES.items()}
+_KEYS_TUPLE = tuple(RAW_DATA_SOURCES.keys())
+# Worker cap for concurrent processing; MAX_WORKERS env var overrides the config value
+MAX_WORKERS = int(os.environ.get("MAX_WORKERS", CONFIG.get("MAX_WORKERS", 4)))
 
 def get_source_by_id(source_id):
     """Get source key based on ID."""
-    for source_key, source_data in RAW_DATA_SOURCES.items():
-        if source_data["id"] == source_id:
-            return source_key
-    return None
+    return _ID_TO_KEY.get(source_id)
 
 def process_source(source_key):
     """Process a single data source by key."""
     if source_key not in RAW_DATA_SOURCES:
-        logging.error(f"Source key '{source_key}' not found in configuration.")
+        logger.error("Source key '%s' not found in configuration.", source_key)
         return False
     
     source_config = RAW_DATA_SOURCES[source_key]
@@ -36,18 +35,18 @@ def process_source(source_key):
     # Read the raw data file
     raw_data = read_raw_data(source_key)
     if raw_data is None:
-        logging.error(f"Failed to read raw data for source: {source_key}")
+        logger.error("Failed to read raw data for source: %s", source_key)
         return False
     
     # Normalize and process the data
     processed_df = normalize_data(raw_data, source_type)
     if processed_df is None:
-        logging.error(f"Failed to normalize data for source: {source_key}")
+        logger.error("Failed to normalize data for source: %s", source_key)
         return False
     
     # Save the processed data
     save_data(processed_df, source_key)
-    logging.info(f"Successfully processed data for source: {source_key}")
+    logger.info("Successfully processed data for source: %s", source_key)
     return True
 
 def lambdaHandler(event, context):
@@ -55,14 +54,14 @@ def lambdaHandler(event, context):
     processor_name = processor_info.get("processor_name", "unknown_processor")
     run_id = processor_info.get("run_processor_id", "000")
     
-    logging.info(f"Running Processor: {processor_name} | Run ID: {run_id}")
+    logger.info("Running Processor: %s | Run ID: %s", processor_name, run_id)
     
     try:
         source_id = int(run_id)
         source_key = get_source_by_id(source_id)
         
         if source_key:
-            logging.info(f"Processing source with ID {source_id} (key: {source_key})")
+            logger.info("Processing source with ID %s (key: %s)", source_id, source_key)
             if process_source(source_key):
                 return {
                     "statusCode": 200,
@@ -75,26 +74,25 @@ def lambdaHandler(event, context):
                 }
         else:
             # If source ID not found, process all sources
-            logging.info(f"Source ID {source_id} not found. Processing all sources.")
+            logger.info("Source ID %s not found. Processing all sources.", source_id)
             return process_all_sources()
         
     except ValueError:
         # If run_id is not a valid integer, process all sources
-        logging.info(f"Invalid run ID format: {run_id}. Processing all sources.")
+        logger.info("Invalid run ID format: %s. Processing all sources.", run_id)
         return process_all_sources()
 
 def process_all_sources():
     """Process all available sources."""
-    logging.info(f"Processing all sources: {list(RAW_DATA_SOURCES.keys())}")
+    logger.info("Processing all sources: %s", list(_KEYS_TUPLE))
     
-    success_count = 0
-    fail_count = 0
+    # Sources are independent; pandas and pyarrow release the GIL in their heavy loops
+    max_workers = max(1, min(MAX_WORKERS, len(_KEYS_TUPLE)))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(process_source, _KEYS_TUPLE))
     
-    for source_key in RAW_DATA_SOURCES.keys():
-        if process_source(source_key):
-            success_count += 1
-        else:
-            fail_count += 1
+    success_count = sum(results)
+    fail_count = len(results) - success_count
     
     if fail_count == 0:
         return {
@@ -103,7 +101,7 @@ def process_all_sources():
         }
     else:
         return {
-            "statusCode": 207,  
+            "statusCode": 207,
             "body": f"Data processing completed with {success_count} successes and {fail_count} failures."
         }
 
@@ -115,4 +113,4 @@ if __name__ == "__main__":
         }
     }
     result = lambdaHandler(inputDA, "")
-    print(json.dumps(result, indent=2))
\ No newline at end of file
+    print(orjson.dumps(result, option=orjson.OPT_INDENT_2).decode())
\ No newline at end of file
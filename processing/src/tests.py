@@ -1,101 +1,110 @@
 import unittest
+import copy
+import io
 import os
 import sys
-import json
+import orjson
+import numpy as np
 import pandas as pd
 import shutil
+import tempfile
 from unittest.mock import patch, MagicMock
 
 # Add the parent directory to sys.path to import from processing
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from processor import read_raw_data, normalize_data, save_data, load_config
+from processor import read_raw_data, normalize_data, save_data, load_config, clean_html
+import processor
 import src.main as processing_main
 
+# Base fixtures for the JSON and CSV sources
+EMPLOYEES_JSON_BYTES = orjson.dumps({
+    "employees": [
+        {
+            "id": 1,
+            "first_name": "John",
+            "last_name": "Doe",
+            "email": "john@example.com",
+            "phone": "555-1234",
+            "gender": "Male",
+            "age": 30,
+            "job_title": "Software Engineer",
+            "years_of_experience": 5,
+            "salary": 85000,
+            "department": "Engineering"
+        },
+        {
+            "id": 2,
+            "first_name": "Jane",
+            "last_name": "Smith",
+            "email": "jane@example.com",
+            "phone": "555-5678",
+            "gender": "Female",
+            "age": 28,
+            "job_title": "Data Scientist",
+            "years_of_experience": 3,
+            "salary": 80000,
+            "department": "Data"
+        }
+    ]
+})
+
+EMPLOYEES_CSV_BYTES = (
+    b"id,first_name,last_name,email,phone,gender,age,job_title,years_of_experience,salary,department\n"
+    b"1,John,Doe,john@example.com,555-1234,Male,30,Software Engineer,5,85000,Engineering\n"
+    b"2,Jane,Smith,jane@example.com,555-5678,Female,28,Data Scientist,3,80000,Data\n"
+)
+
 class TestProcessing(unittest.TestCase):
     
-    def setUp(self):
-        """Set up test environment before each test"""
-        self.config = load_config()
+    @classmethod
+    def setUpClass(cls):
+        """Set up test environment once for the whole class"""
+        cls.config = load_config()
         
-        # Set up paths for raw and processed data
-        self.raw_data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 
-                                         "ingestion", "raw_data")
-        self.processed_data_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 
-                                              "processed_data")
+        # Raw fixtures and processed output live in a class-wide temporary directory
+        cls.temp_dir = tempfile.TemporaryDirectory()
+        cls.raw_data_dir = os.path.join(cls.temp_dir.name, "raw_data")
+        cls.processed_data_dir = os.path.join(cls.temp_dir.name, "processed_data")
+        os.makedirs(cls.raw_data_dir)
         
-        # Create directories if they don't exist
-        os.makedirs(self.raw_data_dir, exist_ok=True)
-        os.makedirs(self.processed_data_dir, exist_ok=True)
+        # Point the processor's source paths and output directory into it
+        test_config = copy.deepcopy(cls.config)
+        for source_config in test_config["RAW_DATA_SOURCES"].values():
+            source_config["path"] = os.path.join(cls.raw_data_dir, os.path.basename(source_config["path"]))
+        cls.patchers = [patch.object(processor, "CONFIG", test_config),
+                        patch.object(processor, "PROCESSED_DATA_DIR", cls.processed_data_dir)]
+        for patcher in cls.patchers:
+            patcher.start()
         
         # Create test files for different types
-        self.create_test_files()
-        
-    def tearDown(self):
-        """Clean up after each test"""
-        # Remove test files
-        for file in os.listdir(self.raw_data_dir):
-            file_path = os.path.join(self.raw_data_dir, file)
-            if file != ".gitkeep" and os.path.isfile(file_path):
-                os.remove(file_path)
-                
-        for file in os.listdir(self.processed_data_dir):
-            file_path = os.path.join(self.processed_data_dir, file)
-            if file != ".gitkeep" and os.path.isfile(file_path):
-                os.remove(file_path)
+        cls.create_test_files()
+        
+    @classmethod
+    def tearDownClass(cls):
+        """Clean up after all tests"""
+        for patcher in cls.patchers:
+            patcher.stop()
+        cls.temp_dir.cleanup()
+    
+    def use_scratch_file(self, source_id):
+        """Point a source at a per-test file so mutating tests leave the shared fixtures intact"""
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        source_config = processor.CONFIG["RAW_DATA_SOURCES"][source_id]
+        file_path = os.path.join(temp_dir.name, os.path.basename(source_config["path"]))
+        patcher = patch.dict(source_config, path=file_path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return file_path
     
-    def create_test_files(self):
+    @classmethod
+    def create_test_files(cls):
         """Create test files for different source types"""
-        # JSON test file
-        json_file = os.path.join(self.raw_data_dir, "employees_json.json")
-        json_data = {
-            "employees": [
-                {
-                    "id": 1,
-                    "first_name": "John",
-                    "last_name": "Doe",
-                    "email": "john@example.com",
-                    "phone": "555-1234",
-                    "gender": "Male",
-                    "age": 30,
-                    "job_title": "Software Engineer",
-                    "years_of_experience": 5,
-                    "salary": 85000,
-                    "department": "Engineering"
-                },
-                {
-                    "id": 2,
-                    "first_name": "Jane",
-                    "last_name": "Smith",
-                    "email": "jane@example.com",
-                    "phone": "555-5678",
-                    "gender": "Female",
-                    "age": 28,
-                    "job_title": "Data Scientist",
-                    "years_of_experience": 3,
-                    "salary": 80000,
-                    "department": "Data"
-                }
-            ]
-        }
-        with open(json_file, 'w') as f:
-            json.dump(json_data, f)
-        
-        # CSV test file
-        csv_file = os.path.join(self.raw_data_dir, "employees_csv.csv")
-        csv_data = pd.DataFrame({
-            "id": [1, 2],
-            "first_name": ["John", "Jane"],
-            "last_name": ["Doe", "Smith"],
-            "email": ["john@example.com", "jane@example.com"],
-            "phone": ["555-1234", "555-5678"],
-            "gender": ["Male", "Female"],
-            "age": [30, 28],
-            "job_title": ["Software Engineer", "Data Scientist"],
-            "years_of_experience": [5, 3],
-            "salary": [85000, 80000],
-            "department": ["Engineering", "Data"]
-        })
-        csv_data.to_csv(csv_file, index=False)
+        # Fixture contents are serialized once at import, so this is just two writes
+        with open(os.path.join(cls.raw_data_dir, "employees_json.json"), 'wb') as f:
+            f.write(EMPLOYEES_JSON_BYTES)
+        with open(os.path.join(cls.raw_data_dir, "employees_csv.csv"), 'wb') as f:
+            f.write(EMPLOYEES_CSV_BYTES)
     
     def test_validate_file_type_json(self):
         """Test Case 3: Validate JSON file type and format"""
@@ -122,7 +131,7 @@ class TestProcessing(unittest.TestCase):
     def test_invalid_file_type(self):
         """Test Case 3: Validate handling of unsupported file types"""
         # Create an unsupported file type in the config for testing
-        temp_config = self.config.copy()
+        temp_config = copy.deepcopy(self.config)
         temp_config["RAW_DATA_SOURCES"]["employees_xml"] = {
             "id": 103,
             "path": "./ingestion/raw_data/employees_xml.xml",
@@ -136,54 +145,44 @@ class TestProcessing(unittest.TestCase):
             # Assert function returns None for unsupported format
             self.assertIsNone(data)
     
-    def test_data_structure_json(self):
-        """Test Case 4: Validate data structure for JSON"""
-        # Read the JSON test file
-        data = read_raw_data("employees_json")
-        
-        # Process the data
-        processed_df = normalize_data(data, "json")
-        
-        # Assert the data structure is correct
-        self.assertIsNotNone(processed_df)
-        self.assertIsInstance(processed_df, pd.DataFrame)
-        
-        # Check for required columns
+    def test_data_structure(self):
+        """Test Case 4: Validate data structure for each source type"""
         required_cols = ["id", "Full Name", "email", "phone", "gender", "age", 
                          "job_title", "years_of_experience", "salary", "department", "designation"]
-        for col in required_cols:
-            self.assertIn(col, processed_df.columns)
         
-        # Check specific data transformations
-        self.assertEqual(processed_df["Full Name"].iloc[0], "John Doe")
-        self.assertEqual(processed_df["designation"].iloc[0], "Data Engineer")  # Based on 5 years experience
+        for source_id, source_type in (("employees_json", "json"), ("employees_csv", "csv")):
+            with self.subTest(source_type=source_type):
+                # Read and process the test file
+                processed_df = normalize_data(read_raw_data(source_id), source_type)
+                
+                # Assert the data structure is correct
+                self.assertIsNotNone(processed_df)
+                self.assertIsInstance(processed_df, pd.DataFrame)
+                self.assertEqual(processed_df.columns.tolist()[:len(required_cols)], required_cols)
+                
+                # Check specific data transformations
+                self.assertEqual(processed_df["Full Name"].iloc[0], "John Doe")
+                self.assertEqual(processed_df["designation"].iloc[0], "Data Engineer")  # Based on 5 years experience
     
-    def test_data_structure_csv(self):
-        """Test Case 4: Validate data structure for CSV"""
-        # Read the CSV test file
-        data = read_raw_data("employees_csv")
+    def test_designation_buckets(self):
+        """Test designations are assigned from years of experience"""
+        experience = pd.Series([0, 1, 2, 3, 5, 6, 10, 11, 25])
+        data = {"employees": [{"id": i + 1, "years_of_experience": int(exp)} for i, exp in enumerate(experience)]}
         
-        # Process the data
-        processed_df = normalize_data(data, "csv")
-        
-        # Assert the data structure is correct
-        self.assertIsNotNone(processed_df)
-        self.assertIsInstance(processed_df, pd.DataFrame)
-        
-        # Check for required columns
-        required_cols = ["id", "Full Name", "email", "phone", "gender", "age", 
-                         "job_title", "years_of_experience", "salary", "department", "designation"]
-        for col in required_cols:
-            self.assertIn(col, processed_df.columns)
+        processed_df = normalize_data(data, "json")
         
-        # Check specific data transformations
-        self.assertEqual(processed_df["Full Name"].iloc[0], "John Doe")
-        self.assertEqual(processed_df["designation"].iloc[0], "Data Engineer")  # Based on 5 years experience
+        # Assert the whole column against the expected buckets at once
+        expected = np.select(
+            [experience == 0, experience < 3, experience <= 5, experience <= 10],
+            ["Unknown", "System Engineer", "Data Engineer", "Senior Data Engineer"],
+            default="Lead")
+        pd.testing.assert_series_equal(processed_df["designation"].astype(str),
+                                       pd.Series(expected, name="designation").astype(str))
     
     def test_missing_data(self):
         """Test Case 5: Handle missing or invalid data"""
         # Create a JSON file with missing data
-        json_file = os.path.join(self.raw_data_dir, "employees_json.json")
+        json_file = self.use_scratch_file("employees_json")
         json_data = {
             "employees": [
                 {
@@ -214,8 +213,8 @@ class TestProcessing(unittest.TestCase):
                 }
             ]
         }
-        with open(json_file, 'w') as f:
-            json.dump(json_data, f)
+        with open(json_file, 'wb') as f:
+            f.write(orjson.dumps(json_data))
         
         # Read and process the data
         data = read_raw_data("employees_json")
@@ -239,7 +238,7 @@ class TestProcessing(unittest.TestCase):
     def test_invalid_data_csv(self):
         """Test Case 5: Handle invalid CSV data"""
         # Create an invalid CSV file (header only, no data)
-        csv_file = os.path.join(self.raw_data_dir, "employees_csv.csv")
+        csv_file = self.use_scratch_file("employees_csv")
         with open(csv_file, 'w') as f:
             f.write("id,first_name,last_name,email")  # Header only
         
@@ -249,10 +248,66 @@ class TestProcessing(unittest.TestCase):
         # Assert function returns None for invalid CSV
         self.assertIsNone(data)
     
+    def test_duplicate_csv_headers(self):
+        """Test a CSV with a repeated header is read and normalized"""
+        csv_file = self.use_scratch_file("employees_csv")
+        with open(csv_file, 'wb') as f:
+            f.write(b"id,name,name,email\n1,John Doe,JD,john@example.com\n2,Jane Smith,JS,jane@example.com\n")
+        
+        data = read_raw_data("employees_csv")
+        
+        # Assert the repeated header is suffixed like the default CSV parser does
+        self.assertEqual(data.columns.tolist(), ["id", "name", "name.1", "email"])
+        
+        # Assert the first name column becomes Full Name
+        processed_df = normalize_data(data, "csv")
+        self.assertEqual(processed_df["Full Name"].tolist(), ["John Doe", "Jane Smith"])
+    
+    def test_dedup_columns(self):
+        """Test repeated column names are suffixed like pandas' default CSV parser"""
+        for header in ("a,a,a", "a,a,a.1", "a,a.1,a", "a,a,a.1,a.2,a"):
+            with self.subTest(header=header):
+                row = ",".join("1" * (header.count(",") + 1))
+                expected = pd.read_csv(io.StringIO(f"{header}\n{row}\n")).columns.tolist()
+                self.assertEqual(processor.dedup_columns(header.split(",")), expected)
+    
+    def test_case_colliding_columns(self):
+        """Test columns that differ only in case are kept apart after lowercasing"""
+        csv_file = self.use_scratch_file("employees_csv")
+        with open(csv_file, 'wb') as f:
+            f.write(b"id,first_name,last_name,Email,email\n"
+                    b"1,John,Doe,john@work.com,john@home.com\n"
+                    b"2,Jane,Smith,jane@work.com,jane@home.com\n")
+        
+        processed_df = normalize_data(read_raw_data("employees_csv"), "csv")
+        
+        # Assert the first column keeps the name and the second is suffixed at the end
+        self.assertEqual(processed_df["email"].tolist(), ["john@work.com", "jane@work.com"])
+        self.assertEqual(processed_df["email.1"].tolist(), ["john@home.com", "jane@home.com"])
+    
+    def test_ragged_csv_rows(self):
+        """Test a CSV row with missing trailing fields is kept and padded"""
+        csv_file = self.use_scratch_file("employees_csv")
+        with open(csv_file, 'wb') as f:
+            f.write(b"id,name,email,phone\n"
+                    b"1,John Doe,john@example.com,555-1234\n"
+                    b"2,Jane Smith,jane@example.com\n"
+                    b"3,Ann Lee,ann@example.com,555-5678\n")
+        
+        data = read_raw_data("employees_csv")
+        
+        # Assert the short row survives with its missing field empty
+        self.assertEqual(len(data), 3)
+        self.assertTrue(pd.isna(data["phone"].iloc[1]))
+        
+        processed_df = normalize_data(data, "csv")
+        self.assertEqual(processed_df["Full Name"].tolist(), ["John Doe", "Jane Smith", "Ann Lee"])
+        self.assertEqual(processed_df["phone"].iloc[1], "Invalid Number")
+    
     def test_empty_json(self):
         """Test Case 5: Handle empty JSON data"""
         # Create an empty JSON file
-        json_file = os.path.join(self.raw_data_dir, "employees_json.json")
+        json_file = self.use_scratch_file("employees_json")
         with open(json_file, 'w') as f:
             f.write("{}")  # Empty JSON
         
@@ -263,10 +318,19 @@ class TestProcessing(unittest.TestCase):
         # Assert function returns None for empty data
         self.assertIsNone(processed_df)
     
+    def test_empty_employees(self):
+        """Test an empty employees list normalizes to an empty frame"""
+        processed_df = normalize_data({"employees": []}, "json")
+        
+        # Assert the output keeps its schema with no rows
+        self.assertIsNotNone(processed_df)
+        self.assertTrue(processed_df.empty)
+        self.assertEqual(processed_df.columns.tolist(), processor.FINAL_COLUMNS)
+    
     def test_corrupted_json(self):
         """Test Case 5: Handle corrupted JSON data"""
         # Create a corrupted JSON file
-        json_file = os.path.join(self.raw_data_dir, "employees_json.json")
+        json_file = self.use_scratch_file("employees_json")
         with open(json_file, 'w') as f:
             f.write("{corrupted json content")  # Corrupted JSON
         
@@ -276,6 +340,64 @@ class TestProcessing(unittest.TestCase):
         # Assert function returns None for corrupted JSON
         self.assertIsNone(data)
     
+    def test_phone_cleaning(self):
+        """Test phone numbers are reduced to digits or flagged as invalid"""
+        data = {"employees": [
+            {"id": 1, "first_name": "John", "last_name": "Doe", "phone": "(555) 012-3456"},
+            {"id": 2, "first_name": "Jane", "last_name": "Smith", "phone": "555-1234x89"},
+            {"id": 3, "first_name": "Ann", "last_name": "Lee", "phone": "n/a"},
+            {"id": 4, "first_name": "Bob", "last_name": "Ray", "phone": None},
+            {"id": 5, "first_name": "Tom", "last_name": "Kay", "phone": "007"}
+        ]}
+        
+        processed_df = normalize_data(data, "json")
+        
+        # Assert digits are kept and invalid numbers are flagged
+        self.assertEqual(processed_df["phone"].tolist(),
+                         ["5550123456", "Invalid Number", "Invalid Number", "Invalid Number", "7"])
+    
+    def test_clean_html(self):
+        """Test HTML tags and entities are stripped from text"""
+        self.assertEqual(clean_html("<p>Data &amp; <b>AI</b></p> "), "Data & AI")
+        
+        # Assert plain text and non-string values are returned untouched
+        self.assertEqual(clean_html("a < b > c"), "a < b > c")
+        self.assertIsNone(clean_html(None))
+    
+    def assert_saved_files(self, processed_df, source_id, expected_extensions):
+        """Assert which processed files a source produced and that they read back equal to the frame"""
+        files = sorted(name for name in os.listdir(self.processed_data_dir) if name.startswith(f"{source_id}_"))
+        self.assertEqual(files, sorted(f"{source_id}_processed.{ext}" for ext in expected_extensions))
+        
+        # Assert the atomic writes left no temporary files behind
+        self.assertFalse([name for name in os.listdir(self.processed_data_dir) if name.endswith(".part")])
+        
+        parquet_path = os.path.join(self.processed_data_dir, f"{source_id}_processed.parquet")
+        # Categorical columns come back with plain str categories instead of the Arrow-backed ones
+        pd.testing.assert_frame_equal(pd.read_parquet(parquet_path), processed_df,
+                                      check_dtype=False, check_categorical=False)
+        if "csv" in expected_extensions:
+            csv_path = os.path.join(self.processed_data_dir, f"{source_id}_processed.csv")
+            pd.testing.assert_frame_equal(pd.read_csv(csv_path, dtype=str), processed_df.astype(str))
+    
+    def test_save_data(self):
+        """Test save_data writes Parquet, plus CSV when enabled"""
+        processed_df = normalize_data(read_raw_data("employees_json"), "json")
+        
+        # (EMIT_CSV, save_csv override, files expected)
+        cases = [
+            (False, None, ["parquet"]),
+            (True, None, ["parquet", "csv"]),
+            (False, True, ["parquet", "csv"]),
+            (True, False, ["parquet"]),
+        ]
+        for i, (emit_csv, save_csv, expected_extensions) in enumerate(cases):
+            with self.subTest(emit_csv=emit_csv, save_csv=save_csv):
+                source_id = f"save_case_{i}"
+                with patch.object(processor, "EMIT_CSV", emit_csv):
+                    save_data(processed_df, source_id, save_csv=save_csv)
+                self.assert_saved_files(processed_df, source_id, expected_extensions)
+    
     @patch('processing.processor.read_raw_data')
     def test_process_source_handler(self, mock_read):
         """Test the process_source handler in the main module"""